@@ -1,11 +1,15 @@
 import streamlit as st
 import requests
+import orjson
 import pandas as pd
 import numpy as np
 import datetime
 import plotly.graph_objects as go
 import re
 from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Set YouTube API Key from secrets
 if "YT_API_KEY" in st.secrets:
@@ -36,6 +40,11 @@ st.markdown("""
         margin: 1rem 0;
         color: #333;
     }
+    .metric-grid {
+        display: grid;
+        grid-template-columns: repeat(auto-fit, minmax(12rem, 1fr));
+        gap: 1rem;
+    }
     .metric-card {
         padding: 1rem;
         border-radius: 10px;
@@ -62,149 +71,232 @@ st.markdown("""
 st.markdown("<div class='main-header'>YouTube Video Outlier Analysis</div>", unsafe_allow_html=True)
 st.markdown("Find out if your video is an outlier compared to the channel's average performance")
 
+# ------------------------
+# API Helpers
+# ------------------------
+@st.cache_resource(show_spinner=False)
+def _session():
+    """Shared session so YouTube API calls across reruns reuse pooled keep-alive connections"""
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+    ))
+    return session
+
+YOUTUBE_API_URL = "https://www.googleapis.com/youtube/v3"
+
+class YouTubeAPIError(Exception):
+    """Raised for failed YouTube API requests; the message names the endpoint and status, never the URL"""
+
+def _api_error_message(response):
+    """Return the API's own error message from a JSON error body, if there is one"""
+    try:
+        return orjson.loads(response.content)['error']['message']
+    except (orjson.JSONDecodeError, KeyError, TypeError):
+        return response.reason
+
+def _get_json(endpoint, params, api_key):
+    """GET a YouTube API endpoint with URL-encoded params and decode the JSON body with orjson"""
+    # The key goes in a header, not the query string, so it never shows up in error URLs
+    try:
+        response = _session().get(
+            f"{YOUTUBE_API_URL}/{endpoint}",
+            params=params,
+            headers={"X-Goog-Api-Key": api_key},
+            timeout=10
+        )
+        response.raise_for_status()
+    except requests.HTTPError as e:
+        raise YouTubeAPIError(
+            f"YouTube API {endpoint} request failed ({e.response.status_code}): {_api_error_message(e.response)}"
+        ) from e
+    except requests.RequestException as e:
+        # RetryError/ConnectionError messages embed the request path and query string
+        raise YouTubeAPIError(f"YouTube API {endpoint} request failed ({type(e).__name__})") from e
+    return orjson.loads(response.content)
+
 # ------------------------
 # URL Parsing Functions
 # ------------------------
+# Group 1 is the URL type ('channel/', 'c/', 'user/' or '@'), group 2 the identifier
+CHANNEL_URL_PATTERN = re.compile(r'youtube\.com/(channel/|c/|user/|@)([^/\s?]+)')
+
 def extract_channel_id(url):
     """Extract channel ID from various YouTube URL formats"""
-    patterns = [
-        r'youtube\.com/channel/([^/\s?]+)',
-        r'youtube\.com/c/([^/\s?]+)',
-        r'youtube\.com/user/([^/\s?]+)',
-        r'youtube\.com/@([^/\s?]+)'
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            identifier = match.group(1)
-            if pattern == patterns[0] and identifier.startswith('UC'):
-                return identifier
-            return get_channel_id_from_identifier(identifier, pattern)
-    if url.strip().startswith('UC'):
-        return url.strip()
+    stripped = url.strip()
+    # Fast path: canonical UC... IDs need neither the URL pattern nor an API lookup
+    if stripped.startswith('UC') and len(stripped) >= 20 and stripped.replace('_', '').replace('-', '').isalnum():
+        return stripped
+    if 'youtube.com/channel/UC' in stripped:
+        return stripped.split('/channel/', 1)[1].split('/')[0].split('?')[0]
+    match = CHANNEL_URL_PATTERN.search(url)
+    if match:
+        url_type, identifier = match.groups()
+        if url_type == 'channel/' and identifier.startswith('UC'):
+            return identifier
+        return get_channel_id_from_identifier(identifier, url_type)
+    if stripped.startswith('UC'):
+        return stripped
     return None
 
+# watch URLs end the ID at '&', path-style URLs (youtu.be, embed, v, shorts) at '?'
+VIDEO_URL_PATTERN = re.compile(
+    r'youtube\.com/watch\?v=([^&\s]+)'
+    r'|(?:youtu\.be|youtube\.com/embed|youtube\.com/v|youtube\.com/shorts)/([^?\s]+)'
+)
+VIDEO_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{11}$')
+
 def extract_video_id(url):
     """Extract video ID from various YouTube URL formats, including Shorts"""
-    patterns = [
-        r'youtube\.com/watch\?v=([^&\s]+)',
-        r'youtu\.be/([^?\s]+)',
-        r'youtube\.com/embed/([^?\s]+)',
-        r'youtube\.com/v/([^?\s]+)',
-        r'youtube\.com/shorts/([^?\s]+)'
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            return match.group(1)
-    if re.match(r'^[A-Za-z0-9_-]{11}$', url.strip()):
+    match = VIDEO_URL_PATTERN.search(url)
+    if match:
+        return match.group(match.lastindex)
+    if VIDEO_ID_PATTERN.match(url.strip()):
         return url.strip()
     return None
 
-def get_channel_id_from_identifier(identifier, pattern_used):
-    """Get channel ID from channel name, username, or handle"""
+@st.cache_data(ttl=86400, show_spinner=False)
+def _resolve_channel_identifier(identifier, url_type):
+    """Resolve a channel identifier via the API; errors propagate so they are never cached"""
+    if url_type == 'channel/':
+        return identifier
+    elif url_type == 'c/':
+        search_params = {"part": "snippet", "type": "channel", "q": identifier}
+    elif url_type == 'user/':
+        username_res = _get_json("channels", {"part": "id", "forUsername": identifier}, yt_api_key)
+        if 'items' in username_res and username_res['items']:
+            return username_res['items'][0]['id']
+        search_params = {"part": "snippet", "type": "channel", "q": identifier}
+    elif url_type == '@':
+        if identifier.startswith('@'):
+            identifier = identifier[1:]
+        search_params = {"part": "snippet", "type": "channel", "q": identifier}
+    else:
+        search_params = {"part": "snippet", "type": "channel", "q": identifier}
+    if 'search_params' in locals():
+        search_res = _get_json("search", search_params, yt_api_key)
+        if 'items' in search_res and search_res['items']:
+            return search_res['items'][0]['id']['channelId']
+    return None
+
+def get_channel_id_from_identifier(identifier, url_type):
+    """Get channel ID from channel name, username, or handle ('channel/', 'c/', 'user/' or '@' URL type)"""
     try:
-        if pattern_used == r'youtube\.com/channel/([^/\s?]+)':
-            return identifier
-        elif pattern_used == r'youtube\.com/c/([^/\s?]+)':
-            search_url = f"https://www.googleapis.com/youtube/v3/search?part=snippet&type=channel&q={identifier}&key={yt_api_key}"
-        elif pattern_used == r'youtube\.com/user/([^/\s?]+)':
-            username_url = f"https://www.googleapis.com/youtube/v3/channels?part=id&forUsername={identifier}&key={yt_api_key}"
-            username_res = requests.get(username_url).json()
-            if 'items' in username_res and username_res['items']:
-                return username_res['items'][0]['id']
-            search_url = f"https://www.googleapis.com/youtube/v3/search?part=snippet&type=channel&q={identifier}&key={yt_api_key}"
-        elif pattern_used == r'youtube\.com/@([^/\s?]+)':
-            if identifier.startswith('@'):
-                identifier = identifier[1:]
-            search_url = f"https://www.googleapis.com/youtube/v3/search?part=snippet&type=channel&q={identifier}&key={yt_api_key}"
-        else:
-            search_url = f"https://www.googleapis.com/youtube/v3/search?part=snippet&type=channel&q={identifier}&key={yt_api_key}"
-        if 'search_url' in locals():
-            search_res = requests.get(search_url).json()
-            if 'items' in search_res and search_res['items']:
-                return search_res['items'][0]['id']['channelId']
+        return _resolve_channel_identifier(identifier, url_type)
     except Exception as e:
         st.error(f"Error resolving channel identifier: {e}")
-    return None
+        return None
 
 # ------------------------
 # Data Fetching Functions
 # ------------------------
+class VideoNotFoundError(Exception):
+    """Raised when the API returns no item for a video ID"""
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _fetch_single_video(video_id, api_key):
+    """Fetch details for a single video; errors propagate so they are never cached"""
+    response = _get_json("videos", {"part": "snippet,statistics,contentDetails", "id": video_id}, api_key)
+    if 'items' not in response or not response['items']:
+        raise VideoNotFoundError(f"No video found with ID {video_id}")
+    video_data = response['items'][0]
+    duration_str = video_data['contentDetails']['duration']
+    duration_seconds = parse_duration(duration_str)
+    return {
+        'videoId': video_id,
+        'title': video_data['snippet']['title'],
+        'channelId': video_data['snippet']['channelId'],
+        'channelTitle': video_data['snippet']['channelTitle'],
+        'publishedAt': video_data['snippet']['publishedAt'],
+        'publishedDay': parse_published_day(video_data['snippet']['publishedAt']),
+        'thumbnailUrl': video_data['snippet'].get('thumbnails', {}).get('medium', {}).get('url', ''),
+        'viewCount': int(video_data['statistics'].get('viewCount', 0)),
+        'likeCount': int(video_data['statistics'].get('likeCount', 0)),
+        'commentCount': int(video_data['statistics'].get('commentCount', 0)),
+        'duration': duration_seconds,
+        'isShort': duration_seconds <= 60
+    }
+
 def fetch_single_video(video_id, api_key):
     """Fetch details for a single video"""
-    video_url = f"https://www.googleapis.com/youtube/v3/videos?part=snippet,statistics,contentDetails&id={video_id}&key={api_key}"
     try:
-        response = requests.get(video_url).json()
-        if 'items' not in response or not response['items']:
-            return None
-        video_data = response['items'][0]
-        duration_str = video_data['contentDetails']['duration']
-        duration_seconds = parse_duration(duration_str)
-        return {
-            'videoId': video_id,
-            'title': video_data['snippet']['title'],
-            'channelId': video_data['snippet']['channelId'],
-            'channelTitle': video_data['snippet']['channelTitle'],
-            'publishedAt': video_data['snippet']['publishedAt'],
-            'thumbnailUrl': video_data['snippet'].get('thumbnails', {}).get('medium', {}).get('url', ''),
-            'viewCount': int(video_data['statistics'].get('viewCount', 0)),
-            'likeCount': int(video_data['statistics'].get('likeCount', 0)),
-            'commentCount': int(video_data['statistics'].get('commentCount', 0)),
-            'duration': duration_seconds,
-            'isShort': duration_seconds <= 60
-        }
+        return _fetch_single_video(video_id, api_key)
+    except VideoNotFoundError:
+        return None
     except Exception as e:
         st.error(f"Error fetching video details: {e}")
         return None
 
+@st.cache_data(ttl=3600, show_spinner=False)
+def _fetch_channel_videos(channel_id, max_videos, api_key):
+    """Fetch videos from a channel; errors propagate so they are never cached"""
+    playlist_res = _get_json("channels", {"part": "contentDetails,snippet,statistics", "id": channel_id}, api_key)
+    if 'items' not in playlist_res or not playlist_res['items']:
+        raise ValueError("Invalid Channel ID or no uploads found.")
+    channel_info = playlist_res['items'][0]
+    channel_name = channel_info['snippet']['title']
+    channel_stats = channel_info['statistics']
+    uploads_playlist_id = channel_info['contentDetails']['relatedPlaylists']['uploads']
+    videos = []
+    next_page_token = ""
+    while (max_videos is None or len(videos) < max_videos) and next_page_token is not None:
+        playlist_items_params = {
+            "part": "contentDetails,snippet",
+            "maxResults": 50,
+            "playlistId": uploads_playlist_id
+        }
+        if next_page_token:
+            playlist_items_params["pageToken"] = next_page_token
+        playlist_items_res = _get_json("playlistItems", playlist_items_params, api_key)
+        for item in playlist_items_res.get('items', []):
+            video_id = item['contentDetails']['videoId']
+            title = item['snippet']['title']
+            published_at = item['snippet']['publishedAt']
+            videos.append({
+                'videoId': video_id,
+                'title': title,
+                'publishedAt': published_at
+            })
+            if max_videos is not None and len(videos) >= max_videos:
+                break
+        next_page_token = playlist_items_res.get('nextPageToken')
+    return videos, channel_name, channel_stats
+
 def fetch_channel_videos(channel_id, max_videos, api_key):
     """Fetch videos from a channel"""
-    playlist_url = f"https://www.googleapis.com/youtube/v3/channels?part=contentDetails,snippet,statistics&id={channel_id}&key={api_key}"
     try:
-        playlist_res = requests.get(playlist_url).json()
-        if 'items' not in playlist_res or not playlist_res['items']:
-            st.error("Invalid Channel ID or no uploads found.")
-            return None, None, None
-        channel_info = playlist_res['items'][0]
-        channel_name = channel_info['snippet']['title']
-        channel_stats = channel_info['statistics']
-        uploads_playlist_id = channel_info['contentDetails']['relatedPlaylists']['uploads']
-        videos = []
-        next_page_token = ""
-        while (max_videos is None or len(videos) < max_videos) and next_page_token is not None:
-            playlist_items_url = f"https://www.googleapis.com/youtube/v3/playlistItems?part=contentDetails,snippet&maxResults=50&playlistId={uploads_playlist_id}&key={api_key}"
-            if next_page_token:
-                playlist_items_url += f"&pageToken={next_page_token}"
-            playlist_items_res = requests.get(playlist_items_url).json()
-            for item in playlist_items_res.get('items', []):
-                video_id = item['contentDetails']['videoId']
-                title = item['snippet']['title']
-                published_at = item['snippet']['publishedAt']
-                videos.append({
-                    'videoId': video_id,
-                    'title': title,
-                    'publishedAt': published_at
-                })
-                if max_videos is not None and len(videos) >= max_videos:
-                    break
-            next_page_token = playlist_items_res.get('nextPageToken')
-        return videos, channel_name, channel_stats
+        return _fetch_channel_videos(channel_id, max_videos, api_key)
     except Exception as e:
         st.error(f"Error fetching YouTube data: {e}")
         return None, None, None
 
-def fetch_video_details(video_ids, api_key):
-    """Fetch details for multiple videos"""
+class VideoDetailsFetchError(Exception):
+    """Raised when some detail chunks failed; carries the details that were fetched"""
+    def __init__(self, message, details):
+        super().__init__(message)
+        self.details = details
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _fetch_video_details(video_ids, api_key):
+    """Fetch details for multiple videos; raises VideoDetailsFetchError so partial results are never cached"""
     if not video_ids:
         return {}
     all_details = {}
+    errors = []
+    # Uploads playlists occasionally repeat an ID; don't spend quota on it twice
+    video_ids = list(dict.fromkeys(video_ids))
     video_chunks = [video_ids[i:i+50] for i in range(0, len(video_ids), 50)]
-    for chunk in video_chunks:
-        video_ids_str = ','.join(chunk)
-        details_url = f"https://www.googleapis.com/youtube/v3/videos?part=contentDetails,statistics,snippet&id={video_ids_str}&key={api_key}"
+    # Issue the chunk requests concurrently; results are consumed in order on this thread
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [
+            executor.submit(_get_json, "videos", {"part": "contentDetails,statistics,snippet", "id": ','.join(chunk)}, api_key)
+            for chunk in video_chunks
+        ]
+    for future in futures:
         try:
-            details_res = requests.get(details_url).json()
+            details_res = future.result()
             for item in details_res.get('items', []):
                 duration_str = item['contentDetails']['duration']
                 duration_seconds = parse_duration(duration_str)
@@ -215,113 +307,168 @@ def fetch_video_details(video_ids, api_key):
                     'likeCount': int(item['statistics'].get('likeCount', 0)),
                     'commentCount': int(item['statistics'].get('commentCount', 0)),
                     'publishedAt': published_at,
+                    'publishedDay': parse_published_day(published_at),
                     'title': item['snippet']['title'],
                     'thumbnailUrl': item['snippet']['thumbnails'].get('medium', {}).get('url', ''),
                     'isShort': duration_seconds <= 60
                 }
         except Exception as e:
-            st.warning(f"Error fetching details for some videos: {e}")
+            errors.append(e)
+    if errors:
+        raise VideoDetailsFetchError(str(errors[0]), all_details)
     return all_details
 
+def fetch_video_details(video_ids, api_key):
+    """Fetch details for multiple videos"""
+    try:
+        return _fetch_video_details(tuple(video_ids), api_key)
+    except VideoDetailsFetchError as e:
+        st.warning(f"Error fetching details for some videos: {e}")
+        return e.details
+
+def parse_published_day(published_at):
+    """Parse an ISO 8601 publish timestamp to the ordinal of its date, for cheap integer age arithmetic"""
+    return datetime.datetime.fromisoformat(published_at.replace('Z', '+00:00')).date().toordinal()
+
+DURATION_UNIT_SECONDS = {'H': 3600, 'M': 60, 'S': 1}
+
 def parse_duration(duration_str):
-    """Parse ISO 8601 duration format to seconds"""
-    hours = re.search(r'(\d+)H', duration_str)
-    minutes = re.search(r'(\d+)M', duration_str)
-    seconds = re.search(r'(\d+)S', duration_str)
+    """Parse ISO 8601 duration format to seconds in a single pass (day components are ignored)"""
     total_seconds = 0
-    if hours:
-        total_seconds += int(hours.group(1)) * 3600
-    if minutes:
-        total_seconds += int(minutes.group(1)) * 60
-    if seconds:
-        total_seconds += int(seconds.group(1))
+    number = 0
+    for ch in duration_str:
+        if ch.isdigit():
+            number = number * 10 + int(ch)
+        else:
+            total_seconds += number * DURATION_UNIT_SECONDS.get(ch, 0)
+            number = 0
     return total_seconds
 
 # ------------------------
 # Benchmark & Simulation Functions
 # ------------------------
+RNG = np.random.default_rng()
+
 def generate_historical_data(video_details, max_days, is_short=None):
     """Generate historical view data for benchmark videos"""
-    today = datetime.datetime.now().date()
-    all_video_data = []
-    for video_id, details in video_details.items():
-        if is_short is not None and details['isShort'] != is_short:
-            continue
-        try:
-            publish_date = datetime.datetime.fromisoformat(details['publishedAt'].replace('Z', '+00:00')).date()
-            video_age_days = (today - publish_date).days
-        except:
-            continue
-        if video_age_days < 3:
-            continue
-        days_to_generate = video_age_days if max_days > video_age_days else max_days
-        total_views = details['viewCount']
-        video_data = generate_view_trajectory(video_id, days_to_generate, total_views, details['isShort'])
-        all_video_data.extend(video_data)
-    if not all_video_data:
+    if not video_details:
         return pd.DataFrame()
-    return pd.DataFrame(all_video_data)
+    today = datetime.datetime.now().date().toordinal()
+    details_list = list(video_details.values())
+    video_ids = np.array(list(video_details.keys()))
+    ages = today - np.array([details['publishedDay'] for details in details_list])
+    total_views = np.array([details['viewCount'] for details in details_list])
+    shorts = np.array([details['isShort'] for details in details_list])
+    eligible = ages >= 3
+    if is_short is not None:
+        eligible &= shorts == is_short
+    if not eligible.any():
+        return pd.DataFrame()
+    day_counts = np.minimum(ages[eligible], max_days)
+    offsets = np.cumsum(day_counts) - day_counts
+    total_rows = int(day_counts.sum())
+    # Fill preallocated columns in place rather than concatenating per-video arrays
+    daily_views = np.empty(total_rows, dtype=np.int64)
+    cumulative_views = np.empty(total_rows, dtype=np.int64)
+    for start, days, views, short in zip(offsets, day_counts, total_views[eligible], shorts[eligible]):
+        rows = slice(start, start + days)
+        daily_views[rows], cumulative_views[rows] = generate_view_trajectory(days, views, short)
+    return pd.DataFrame({
+        'videoId': np.repeat(video_ids[eligible], day_counts),
+        # Day index restarts at 0 for every video: position in the flat array minus that video's offset
+        'day': np.arange(total_rows) - np.repeat(offsets, day_counts),
+        'daily_views': daily_views,
+        'cumulative_views': cumulative_views
+    })
 
-def generate_view_trajectory(video_id, days, total_views, is_short):
-    """Generate view trajectory based on video type"""
-    data = []
+def generate_view_trajectory(days, total_views, is_short):
+    """Generate daily and cumulative view arrays based on video type"""
+    progress = np.arange(1, days + 1) / days
     if is_short:
-        trajectory = [total_views * (1 - np.exp(-5 * ((i+1)/days)**1.5)) for i in range(days)]
+        trajectory = total_views * (1 - np.exp(-5 * progress**1.5))
     else:
         k = 10
-        trajectory = [total_views * (1 / (1 + np.exp(-k * ((i+1)/days - 0.35)))) for i in range(days)]
+        trajectory = total_views * (1 / (1 + np.exp(-k * (progress - 0.35))))
     
     scaling_factor = total_views / trajectory[-1] if trajectory[-1] > 0 else 1
-    trajectory = [v * scaling_factor for v in trajectory]
+    trajectory = trajectory * scaling_factor
     
     noise_factor = 0.05
-    for i in range(days):
-        noise = np.random.normal(0, noise_factor * total_views)
-        if i == 0:
-            noisy_value = max(100, trajectory[i] + noise)
-        else:
-            noisy_value = max(trajectory[i-1] + 10, trajectory[i] + noise)
-        trajectory[i] = noisy_value
+    noisy = trajectory + RNG.normal(0, noise_factor * total_views, days)
+    noisy[0] = max(100, noisy[0])
+    # Each day must gain at least 10 views; after subtracting 10*i that floor is a running maximum
+    floor_steps = 10 * np.arange(days)
+    trajectory = np.maximum.accumulate(noisy - floor_steps) + floor_steps
     
-    daily_views = [trajectory[0]]
-    for i in range(1, days):
-        daily_views.append(trajectory[i] - trajectory[i-1])
-    
-    for day in range(days):
-        data.append({
-            'videoId': video_id,
-            'day': day,
-            'daily_views': int(daily_views[day]),
-            'cumulative_views': int(trajectory[day])
-        })
-    return data
+    daily_views = np.diff(trajectory, prepend=0)
+    return daily_views.astype(np.int64), trajectory.astype(np.int64)
 
 def calculate_benchmark(df, band_percentage):
     """Calculate benchmark statistics based on historical data"""
     lower_q = (100 - band_percentage) / 200
     upper_q = 1 - (100 - band_percentage) / 200
-    summary = df.groupby('day')['cumulative_views'].agg([
-        ('lower_band', lambda x: x.quantile(lower_q)),
-        ('upper_band', lambda x: x.quantile(upper_q)),
-        ('median', 'median'),
-        ('mean', 'mean'),
-        ('count', 'count')
-    ]).reset_index()
+    # One row per video, one column per day; videos younger than a given day are NaN there
+    views_by_day = df.pivot(index='videoId', columns='day', values='cumulative_views')
+    values = views_by_day.to_numpy(dtype=float)
+    lower_band, median, upper_band = np.nanpercentile(values, [lower_q * 100, 50, upper_q * 100], axis=0)
+    summary = pd.DataFrame({
+        'day': views_by_day.columns.to_numpy(),
+        'lower_band': lower_band,
+        'upper_band': upper_band,
+        'median': median,
+        'mean': np.nanmean(values, axis=0),
+        'count': np.count_nonzero(~np.isnan(values), axis=0)
+    })
     summary['channel_average'] = (summary['lower_band'] + summary['upper_band']) / 2
     return summary
 
+@st.cache_data(ttl=3600, show_spinner=False)
+def build_benchmark(video_details, max_days, is_short, band_percentage):
+    """Generate historical data and calculate benchmark statistics, cached per set of inputs"""
+    df = generate_historical_data(video_details, max_days, is_short)
+    if df.empty:
+        return df
+    return calculate_benchmark(df, band_percentage)
+
+OUTLIER_THRESHOLDS = np.array([0.5, 0.8, 1.2, 1.5, 2.0])
+OUTLIER_CATEGORIES = np.array([
+    "Significant Negative Outlier",
+    "Slight Negative Outlier",
+    "Normal Performance",
+    "Slight Positive Outlier",
+    "Positive Outlier",
+    "Significant Positive Outlier"
+])
+OUTLIER_CLASSES = np.array([
+    "outlier-low",
+    "outlier-low",
+    "outlier-normal",
+    "outlier-normal",
+    "outlier-high",
+    "outlier-high"
+])
+
+def classify_outlier_score(views, channel_averages):
+    """Calculate outlier scores (views / channel average) and their categories for one or more videos"""
+    views = np.asarray(views, dtype=float)
+    channel_averages = np.asarray(channel_averages, dtype=float)
+    has_average = channel_averages > 0
+    scores = np.where(has_average, views / np.where(has_average, channel_averages, 1), 0)
+    idx = np.searchsorted(OUTLIER_THRESHOLDS, scores, side="right")
+    return scores, OUTLIER_CATEGORIES[idx], OUTLIER_CLASSES[idx]
+
 def calculate_outlier_score(current_views, channel_average):
-    """Calculate outlier score as the ratio of current views to channel average"""
-    if channel_average <= 0:
-        return 0
-    return current_views / channel_average
+    """Calculate the outlier score, category and CSS class for a single video"""
+    scores, categories, classes = classify_outlier_score([current_views], [channel_average])
+    return float(scores[0]), str(categories[0]), str(classes[0])
 
 def create_performance_chart(benchmark_data, video_data, video_title):
     """Create a performance comparison chart"""
+    days = benchmark_data['day'].to_numpy()
     fig = go.Figure()
     fig.add_trace(go.Scatter(
-        x=benchmark_data['day'], 
-        y=benchmark_data['lower_band'],
+        x=days,
+        y=benchmark_data['lower_band'].to_numpy(),
         name='Typical Performance Range',
         fill='tonexty',
         fillcolor='rgba(173, 216, 230, 0.3)',
@@ -329,23 +476,23 @@ def create_performance_chart(benchmark_data, video_data, video_title):
         mode='lines'
     ))
     fig.add_trace(go.Scatter(
-        x=benchmark_data['day'], 
-        y=benchmark_data['channel_average'],
+        x=days,
+        y=benchmark_data['channel_average'].to_numpy(),
         name='Channel Average',
         line=dict(color='#4285f4', width=2, dash='dash'),
         mode='lines'
     ))
     fig.add_trace(go.Scatter(
-        x=benchmark_data['day'], 
-        y=benchmark_data['median'],
+        x=days,
+        y=benchmark_data['median'].to_numpy(),
         name='Channel Median',
         line=dict(color='#34a853', width=2, dash='dot'),
         mode='lines'
     ))
     actual_data = video_data[video_data['projected'] == False]
     fig.add_trace(go.Scatter(
-        x=actual_data['day'], 
-        y=actual_data['cumulative_views'],
+        x=actual_data['day'].to_numpy(),
+        y=actual_data['cumulative_views'].to_numpy(),
         name=f'"{video_title}" (Actual)',
         line=dict(color='#ea4335', width=3),
         mode='lines'
@@ -369,43 +516,30 @@ def create_performance_chart(benchmark_data, video_data, video_title):
 
 def simulate_video_performance(video_data, benchmark_data):
     """Simulate video performance based on its actual views"""
-    try:
-        published_at = datetime.datetime.fromisoformat(video_data['publishedAt'].replace('Z', '+00:00')).date()
-        current_date = datetime.datetime.now().date()
-        days_since_publish = (current_date - published_at).days
-    except:
-        days_since_publish = 0
-    
+    days_since_publish = datetime.datetime.now().date().toordinal() - video_data['publishedDay']
     current_views = video_data['viewCount']
-    is_short = video_data['isShort']
     
     if days_since_publish < 2:
         days_since_publish = 2
     
-    data = []
-    benchmark_day_index = min(days_since_publish, len(benchmark_data) - 1)
-    
-    for day in range(days_since_publish + 1):
-        if day >= len(benchmark_data):
-            break
-        if day == days_since_publish:
-            cumulative_views = current_views
-        else:
-            ratio = benchmark_data.loc[day, 'median'] / benchmark_data.loc[benchmark_day_index, 'median'] if benchmark_data.loc[benchmark_day_index, 'median'] > 0 else 0
-            cumulative_views = int(current_views * ratio)
-        if day == 0:
-            daily_views = cumulative_views
-        else:
-            prev_cumulative = data[-1]['cumulative_views']
-            daily_views = max(0, cumulative_views - prev_cumulative)
-        data.append({
-            'day': day,
-            'daily_views': daily_views,
-            'cumulative_views': cumulative_views,
-            'projected': False
-        })
+    # Scale the channel's median curve so it ends at the video's current views
+    medians = benchmark_data['median'].to_numpy()
+    num_days = min(days_since_publish + 1, len(medians))
+    reference_median = medians[min(days_since_publish, len(medians) - 1)]
+    if reference_median > 0:
+        cumulative_views = (current_views * (medians[:num_days] / reference_median)).astype(np.int64)
+    else:
+        cumulative_views = np.zeros(num_days, dtype=np.int64)
+    if num_days == days_since_publish + 1:
+        cumulative_views[-1] = current_views
+    daily_views = np.maximum(np.diff(cumulative_views, prepend=0), 0)
     
-    return pd.DataFrame(data)
+    return pd.DataFrame({
+        'day': np.arange(num_days),
+        'daily_views': daily_views,
+        'cumulative_views': cumulative_views,
+        'projected': False
+    })
 
 # ------------------------
 # Main App Logic
@@ -463,8 +597,8 @@ if st.button("Analyze Video", type="primary") and video_url:
             st.error("Failed to fetch video details. Please check the video URL.")
             st.stop()
         channel_id = video_details['channelId']
-        published_date = datetime.datetime.fromisoformat(video_details['publishedAt'].replace('Z', '+00:00')).date()
-        video_age = (datetime.datetime.now().date() - published_date).days
+        published_date = datetime.date.fromordinal(video_details['publishedDay'])
+        video_age = datetime.datetime.now().date().toordinal() - video_details['publishedDay']
     
     with st.spinner("Fetching channel videos for benchmark..."):
         channel_videos, channel_name, channel_stats = fetch_channel_videos(channel_id, num_videos, yt_api_key)
@@ -478,13 +612,16 @@ if st.button("Analyze Video", type="primary") and video_url:
         if video_details['thumbnailUrl']:
             st.image(video_details['thumbnailUrl'], width=200)
     with col2:
-        st.markdown(f"**Title:** {video_details['title']}")
-        st.markdown(f"**Channel:** {channel_name}")
-        st.markdown(f"**Published:** {published_date} ({video_age} days ago)")
         minutes, seconds = divmod(video_details['duration'], 60)
         hours, minutes = divmod(minutes, 60)
         duration_str = f"{hours}h {minutes}m {seconds}s" if hours else f"{minutes}m {seconds}s"
-        st.markdown(f"**Duration:** {duration_str} ({'Short' if video_details['isShort'] else 'Long-form'})")
+        info_lines = [
+            f"**Title:** {video_details['title']}",
+            f"**Channel:** {channel_name}",
+            f"**Published:** {published_date} ({video_age} days ago)",
+            f"**Duration:** {duration_str} ({'Short' if video_details['isShort'] else 'Long-form'})"
+        ]
+        st.markdown("\n\n".join(info_lines))
         metric_cols = st.columns(3)
         with metric_cols[0]:
             st.metric("Views", f"{video_details['viewCount']:,}")
@@ -507,7 +644,7 @@ if st.button("Analyze Video", type="primary") and video_url:
             is_short_filter = None
             video_type_str = "All Videos"
         
-        video_ids = [v['videoId'] for v in channel_videos]
+        video_ids = tuple(v['videoId'] for v in channel_videos)
         detailed_videos = fetch_video_details(video_ids, yt_api_key)
         if video_id in detailed_videos:
             del detailed_videos[video_id]
@@ -527,69 +664,44 @@ if st.button("Analyze Video", type="primary") and video_url:
         
         # Limit simulation to the current age of the video
         max_days = video_age
-        benchmark_df = generate_historical_data(detailed_videos, max_days, is_short_filter)
-        if benchmark_df.empty:
+        benchmark_stats = build_benchmark(detailed_videos, max_days, is_short_filter, percentile_range)
+        if benchmark_stats.empty:
             st.error("Not enough data to create a benchmark. Try including more videos or changing the video type filter.")
             st.stop()
         
-        benchmark_stats = calculate_benchmark(benchmark_df, percentile_range)
         video_performance = simulate_video_performance(video_details, benchmark_stats)
         day_index = min(video_age, len(benchmark_stats) - 1)
         if day_index < 0:
             day_index = 0
-        benchmark_median = benchmark_stats.loc[day_index, 'median']
-        benchmark_lower = benchmark_stats.loc[day_index, 'lower_band']
-        benchmark_upper = benchmark_stats.loc[day_index, 'upper_band']
-        channel_average = benchmark_stats.loc[day_index, 'channel_average']
-        outlier_score = calculate_outlier_score(video_details['viewCount'], channel_average)
+        final_day = benchmark_stats.iloc[day_index]
+        benchmark_median = final_day['median']
+        benchmark_lower = final_day['lower_band']
+        benchmark_upper = final_day['upper_band']
+        channel_average = final_day['channel_average']
+        outlier_score, outlier_category, outlier_class = calculate_outlier_score(video_details['viewCount'], channel_average)
         
         fig = create_performance_chart(benchmark_stats, video_performance, 
                                       video_details['title'][:40] + "..." if len(video_details['title']) > 40 else video_details['title'])
         st.plotly_chart(fig, use_container_width=True)
         
         st.subheader("Outlier Analysis")
-        if outlier_score >= 2.0:
-            outlier_category = "Significant Positive Outlier"
-            outlier_class = "outlier-high"
-        elif outlier_score >= 1.5:
-            outlier_category = "Positive Outlier"
-            outlier_class = "outlier-high"
-        elif outlier_score >= 1.2:
-            outlier_category = "Slight Positive Outlier"
-            outlier_class = "outlier-normal"
-        elif outlier_score >= 0.8:
-            outlier_category = "Normal Performance"
-            outlier_class = "outlier-normal"
-        elif outlier_score >= 0.5:
-            outlier_category = "Slight Negative Outlier"
-            outlier_class = "outlier-low"
-        else:
-            outlier_category = "Significant Negative Outlier"
-            outlier_class = "outlier-low"
-        
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.markdown(f"""
+        st.markdown(f"""
+        <div class='metric-grid'>
             <div class='metric-card'>
                 <div>Current Views</div>
                 <div style='font-size: 24px; font-weight: bold;'>{video_details['viewCount']:,}</div>
             </div>
-            """, unsafe_allow_html=True)
-        with col2:
-            st.markdown(f"""
             <div class='metric-card'>
                 <div>Channel Average</div>
                 <div style='font-size: 24px; font-weight: bold;'>{int(channel_average):,}</div>
             </div>
-            """, unsafe_allow_html=True)
-        with col3:
-            st.markdown(f"""
             <div class='metric-card'>
                 <div>Outlier Score</div>
                 <div style='font-size: 24px; font-weight: bold;' class='{outlier_class}'>{outlier_score:.2f}</div>
                 <div>{outlier_category}</div>
             </div>
-            """, unsafe_allow_html=True)
+        </div>
+        """, unsafe_allow_html=True)
         
         st.markdown(f"""
         <div class='explanation'>